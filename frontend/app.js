@@ -286,7 +286,7 @@ class RAGFrontend {
                         ${result.sources.map((source, index) => `
                             <div class="source-item">
                                 <strong>Source ${index + 1}</strong> from "${source.metadata.filename}" 
-                                (Relevance: ${source.relevance_percentage || (source.score * 100).toFixed(1)}%)<br>
+                                (Relevance: ${(source.relevance_percentage ?? source.score * 100).toFixed(1)}%)<br>
                                 <em>${source.content.substring(0, 120)}...</em>
                             </div>
                         `).join('')}
@@ -2,6 +2,7 @@
 """
 Database initialization script - metadata only
 """
+import asyncio
 import sys
 import os
 
@@ -13,7 +14,7 @@ from src.models.database import create_tables, engine
 def init_database():
     """Initialize the database with required tables (metadata only)"""
     print("Initializing database for metadata storage...")
-    create_tables()
+    asyncio.run(create_tables())
     print("Database initialized successfully!")
     print("Storage: Document metadata in SQLite, chunks in ChromaDB vector store")
 
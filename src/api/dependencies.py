@@ -1,25 +1,60 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from fastapi import HTTPException, Depends
 from sqlalchemy.orm import Session
 from src.models.database import get_db
 from src.config.settings import settings
 
+@lru_cache(maxsize=1)
 def get_embedding_service():
     from src.services.embedding_service import EmbeddingService
-    return EmbeddingService(model_name=settings.embedding_model)
+    # A preloaded model is loaded before workers fork, and CUDA cannot survive a fork, so
+    # it starts on CPU and the app lifespan moves it to settings.embedding_device.
+    # Otherwise it is first created inside the worker and can go there directly
+    return EmbeddingService(
+        model_name=settings.embedding_model,
+        batch_size=settings.embedding_batch_size,
+        device="cpu" if settings.preload_embedding_model else settings.embedding_device
+    )
 
+@lru_cache(maxsize=1)
 def get_vector_store():
+    from src.services.embedding_service import CachedEmbeddings
     from src.services.vector_store import VectorStore
-    from src.services.embedding_service import EmbeddingService
-    embedding_service = EmbeddingService(model_name=settings.embedding_model)
-    return VectorStore(embeddings=embedding_service.embeddings)
+    embedding_service = get_embedding_service()
+    return VectorStore(
+        embeddings=CachedEmbeddings(
+            embedding_service.embeddings,
+            model_name=embedding_service.model_name,
+            maxsize=settings.embedding_cache_size
+        )
+    )
 
+@lru_cache(maxsize=1)
 def get_llm_service():
     from src.services.llm_service import LLMService
     return LLMService(model=settings.groq_model, api_key=settings.groq_api_key)
 
+@lru_cache(maxsize=1)
 def get_document_processor():
     from src.services.document_processor import DocumentProcessor
     return DocumentProcessor(
         chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap
+        chunk_overlap=settings.chunk_overlap,
+        length_mode=settings.chunk_length_mode
+    )
+
+def get_ingest_workers() -> int:
+    # Affinity-aware, unlike os.cpu_count(), so a container pinned to fewer CPUs isn't oversubscribed
+    return settings.ingest_workers or len(os.sched_getaffinity(0))
+
+@lru_cache(maxsize=1)
+def get_ingest_executor():
+    # Created lazily so the pool is never inherited across a gunicorn --preload fork;
+    # spawn avoids forking a parent that already holds torch and Chroma threads
+    return ProcessPoolExecutor(
+        max_workers=get_ingest_workers(),
+        mp_context=multiprocessing.get_context("spawn")
     )
\ No newline at end of file
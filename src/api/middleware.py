@@ -0,0 +1,29 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.api.responses import ORJSONResponse
+
+class BodySizeLimitMiddleware:
+    """Reject requests whose declared Content-Length exceeds max_body_size.
+
+    FastAPI reads the whole multipart body before an upload route runs, so an
+    oversized file can only be refused before the transfer from its header here.
+    Requests without Content-Length pass through to the route's own size check.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body_size:
+                        response = ORJSONResponse(
+                            {"detail": f"Request body too large. Maximum size is {self.max_body_size} bytes"},
+                            status_code=413
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
@@ -0,0 +1,14 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Only for routes that return plain dicts - routes with a response model are
+    already serialized straight to bytes by Pydantic, which a custom response
+    class would bypass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -1,6 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 import os
+import time
 from typing import List, Optional
 import logging
 
@@ -10,9 +15,12 @@ from src.models.schemas import (
     HealthResponse
 )
 from src.services.document_processor import DocumentProcessor
-from src.services.embedding_service import EmbeddingService
 from src.services.vector_store import VectorStore
 from src.services.llm_service import LLMService
+from src.api.dependencies import (
+    get_document_processor, get_vector_store, get_llm_service, get_ingest_executor, get_ingest_workers
+)
+from src.api.responses import ORJSONResponse
 from src.config.settings import settings
 from src.utils.file_handlers import save_uploaded_file, validate_file
 
@@ -20,93 +28,102 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-document_processor = DocumentProcessor()
-embedding_service = EmbeddingService(model_name=settings.embedding_model)
-vector_store = VectorStore(embeddings=embedding_service.embeddings)
-llm_service = LLMService(model=settings.groq_model, api_key=settings.groq_api_key)
-
-def process_document_background(document_id: str, file_path: str, filename: str):
+async def process_document_background(
+    document_id: str,
+    file_path: str,
+    filename: str,
+    *,
+    document_processor: DocumentProcessor,
+    vector_store: VectorStore
+):
     """Background task to process document - metadata only in database, chunks in vector store"""
-    try:
-        from src.models.database import SessionLocal
-        db = SessionLocal()
-        
-        logger.info(f"Starting to process document: {filename}")
-        
-        # Process document
-        result = document_processor.process_document(file_path, filename)
-        logger.info(f"Document processed: {len(result['chunks'])} chunks created")
-        
-        # Prepare documents for vector store
-        documents_for_store = [
-            {
-                "content": chunk,
-                "document_id": document_id,
-                "chunk_index": i,
-                "filename": filename
-            }
-            for i, chunk in enumerate(result["chunks"])
-        ]
-        
-        # Add to vector store ONLY (no database storage for chunks)
-        logger.info("Adding documents to vector store...")
-        vector_store.add_documents(documents_for_store)
-        logger.info("Documents added to vector store successfully")
-        
-        # Update document record with metadata only
-        document = db.query(Document).filter(Document.id == document_id).first()
-        if document:
-            document.page_count = result.get("page_count")
-            document.chunk_count = len(result["chunks"])  # Store count for reference
-            document.processed = True
-            db.commit()
-            logger.info(f"Successfully processed document: {filename} with {len(result['chunks'])} chunks (metadata in database, chunks in vector store)")
-        else:
-            logger.error(f"Document {document_id} not found in database")
-            
-    except Exception as e:
-        logger.error(f"Error processing document {document_id}: {str(e)}", exc_info=True)
-        # Update document status to indicate failure
+    from src.models.database import SessionLocal
+    async with SessionLocal() as db:
         try:
-            document = db.query(Document).filter(Document.id == document_id).first()
+            logger.info(f"Starting to process document: {filename}")
+            
+            # Parsing and chunking are CPU bound - run them in worker processes so they
+            # neither block the event loop nor contend for the GIL with request handling
+            result = await document_processor.aprocess_document(
+                file_path, filename, get_ingest_executor(), get_ingest_workers()
+            )
+            logger.info(f"Document processed: {len(result['chunks'])} chunks created")
+            
+            # Prepare documents for vector store
+            documents_for_store = [
+                {
+                    "content": chunk,
+                    "document_id": document_id,
+                    "chunk_index": i,
+                    "filename": filename
+                }
+                for i, chunk in enumerate(result["chunks"])
+            ]
+            
+            # Add to vector store ONLY (no database storage for chunks)
+            # Large batches amortise Chroma's per-call overhead; length-sorting keeps
+            # similar-sized chunks together to minimise padding in the embedding batches
+            logger.info("Adding documents to vector store...")
+            documents_for_store.sort(key=lambda doc: len(doc["content"]))
+            batch_size = settings.chroma_batch_size
+            for start in range(0, len(documents_for_store), batch_size):
+                await run_in_threadpool(vector_store.add_documents, documents_for_store[start:start + batch_size])
+            logger.info("Documents added to vector store successfully")
+            
+            # Update document record with metadata only
+            document = await db.get(Document, document_id)
             if document:
-                document.processed = False
-                db.commit()
-                logger.info(f"Marked document {document_id} as failed")
-        except Exception as db_error:
-            logger.error(f"Error updating document status: {str(db_error)}")
-    finally:
-        db.close()
+                document.page_count = result.get("page_count")
+                document.chunk_count = len(result["chunks"])  # Store count for reference
+                document.processed = True
+                await db.commit()
+                logger.info(f"Successfully processed document: {filename} with {len(result['chunks'])} chunks (metadata in database, chunks in vector store)")
+            else:
+                logger.error(f"Document {document_id} not found in database")
+                
+        except Exception as e:
+            logger.error(f"Error processing document {document_id}: {str(e)}", exc_info=True)
+            # Update document status to indicate failure
+            try:
+                await db.rollback()
+                document = await db.get(Document, document_id)
+                if document:
+                    document.processed = False
+                    await db.commit()
+                    logger.info(f"Marked document {document_id} as failed")
+            except Exception as db_error:
+                logger.error(f"Error updating document status: {str(db_error)}")
 
 @router.post("/documents/upload", response_model=DocumentResponse)
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    document_processor: DocumentProcessor = Depends(get_document_processor),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
     """Upload and process a document - store metadata only in database"""
     try:
         logger.info(f"Received upload request for file: {file.filename}")
         
         # Validate file
-        validate_file(file)
+        await validate_file(file)
         logger.info("File validation passed")
         
         # Save file
-        file_path = save_uploaded_file(file)
+        file_path, file_size = await save_uploaded_file(file)
         logger.info(f"File saved to: {file_path}")
         
         # Create document record (metadata only)
         document = Document(
             filename=file.filename,
             file_path=file_path,
-            file_size=os.path.getsize(file_path),
+            file_size=file_size,
             file_type=file.content_type or "unknown"
         )
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
         logger.info(f"Document metadata stored with ID: {document.id}")
         
         # Process document in background (chunks go to vector store only)
@@ -114,49 +131,43 @@ async def upload_document(
             process_document_background, 
             document.id, 
             file_path, 
-            file.filename
+            file.filename,
+            document_processor=document_processor,
+            vector_store=vector_store
         )
         logger.info("Background processing task added")
         
-        return DocumentResponse(
-            id=document.id,
-            filename=document.filename,
-            file_size=document.file_size,
-            file_type=document.file_type,
-            page_count=document.page_count,
-            chunk_count=document.chunk_count,
-            processed=document.processed,
-            created_at=document.created_at
-        )
+        return DocumentResponse.model_validate(document)
         
     except Exception as e:
         logger.error(f"Error uploading document: {str(e)}", exc_info=True)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error uploading document: {str(e)}")
 
 @router.get("/documents", response_model=List[DocumentResponse])
 async def get_documents(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of processed documents (metadata only)"""
     try:
-        documents = db.query(Document).offset(skip).limit(limit).all()
-        logger.info(f"Retrieved {len(documents)} documents from database")
-        return [
-            DocumentResponse(
-                id=doc.id,
-                filename=doc.filename,
-                file_size=doc.file_size,
-                file_type=doc.file_type,
-                page_count=doc.page_count,
-                chunk_count=doc.chunk_count,
-                processed=doc.processed,
-                created_at=doc.created_at
-            )
-            for doc in documents
-        ]
+        # Select only the response columns - plain rows skip ORM object hydration
+        result = await db.execute(
+            select(
+                Document.id,
+                Document.filename,
+                Document.file_size,
+                Document.file_type,
+                Document.page_count,
+                Document.chunk_count,
+                Document.processed,
+                Document.created_at
+            ).offset(skip).limit(limit)
+        )
+        rows = result.all()
+        logger.info("Retrieved %d documents from database", len(rows))
+        return [DocumentResponse(**row._mapping) for row in rows]
     except Exception as e:
         logger.error(f"Error retrieving documents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving documents: {str(e)}")
@@ -164,11 +175,13 @@ async def get_documents(
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(
     query_request: QueryRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_service: LLMService = Depends(get_llm_service)
 ):
     """Query the RAG system using Groq LLM"""
     try:
-        logger.info(f"Received query: {query_request.question}")
+        logger.info("Received query: %s", query_request.question)
         
         # Search vector store using text query
         search_results = vector_store.search(
@@ -176,7 +189,7 @@ async def query_documents(
             top_k=query_request.top_k,
             document_ids=query_request.document_ids
         )
-        logger.info(f"Vector search returned {len(search_results)} results")
+        logger.info("Vector search returned %d results", len(search_results))
         
         if not search_results:
             logger.info("No relevant documents found for query")
@@ -201,17 +214,18 @@ async def query_documents(
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
-@router.delete("/documents/{document_id}")
+@router.delete("/documents/{document_id}", response_class=ORJSONResponse)
 async def delete_document(
     document_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
     """Delete a document and its chunks from the system"""
     try:
         logger.info(f"Deleting document: {document_id}")
         
         # Find document
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = await db.get(Document, document_id)
         if not document:
             logger.warning(f"Document {document_id} not found")
             raise HTTPException(status_code=404, detail="Document not found")
@@ -221,8 +235,8 @@ async def delete_document(
         logger.info("Document chunks deleted from vector store")
         
         # Delete document record (metadata only)
-        db.delete(document)
-        db.commit()
+        await db.delete(document)
+        await db.commit()
         logger.info("Document metadata deleted from database")
         
         # Delete file from storage
@@ -239,11 +253,11 @@ async def delete_document(
         raise
     except Exception as e:
         logger.error(f"Error deleting document: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
 
-@router.get("/vector-store/stats")
-async def get_vector_store_stats():
+@router.get("/vector-store/stats", response_class=ORJSONResponse)
+async def get_vector_store_stats(vector_store: VectorStore = Depends(get_vector_store)):
     """Get vector store statistics"""
     try:
         stats = vector_store.get_collection_stats()
@@ -253,11 +267,12 @@ async def get_vector_store_stats():
         logger.error(f"Error getting vector store stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting vector store stats: {str(e)}")
 
-@router.get("/debug/documents")
-async def debug_documents(db: Session = Depends(get_db)):
+@router.get("/debug/documents", response_class=ORJSONResponse)
+async def debug_documents(db: AsyncSession = Depends(get_db)):
     """Debug endpoint to see all documents in database (metadata only)"""
     try:
-        documents = db.query(Document).all()
+        result = await db.execute(select(Document))
+        documents = result.scalars().all()
         return {
             "total_documents": len(documents),
             "storage_type": "Metadata only (chunks stored in vector store)",
@@ -280,16 +295,20 @@ async def debug_documents(db: Session = Depends(get_db)):
         logger.error(f"Error getting documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/debug/database-stats")
-async def debug_database_stats(db: Session = Depends(get_db)):
+@router.get("/debug/database-stats", response_class=ORJSONResponse)
+async def debug_database_stats(db: AsyncSession = Depends(get_db)):
     """Debug endpoint to see database statistics"""
     try:
-        total_documents = db.query(Document).count()
-        processed_documents = db.query(Document).filter(Document.processed == True).count()
-        failed_documents = db.query(Document).filter(Document.processed == False).count()
-        
-        # Calculate total chunks from processed documents
-        total_chunks = sum(doc.chunk_count or 0 for doc in db.query(Document).filter(Document.processed == True).all())
+        # Aggregate everything in a single SQL pass instead of hydrating rows
+        result = await db.execute(
+            select(
+                func.count(Document.id),
+                func.coalesce(func.sum(case((Document.processed == True, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Document.processed == False, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Document.processed == True, Document.chunk_count), else_=0)), 0)
+            )
+        )
+        total_documents, processed_documents, failed_documents, total_chunks = result.one()
         
         return {
             "database_stats": {
@@ -305,11 +324,11 @@ async def debug_database_stats(db: Session = Depends(get_db)):
         logger.error(f"Error getting database stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/debug/document/{document_id}")
-async def debug_document_detail(document_id: str, db: Session = Depends(get_db)):
+@router.get("/debug/document/{document_id}", response_class=ORJSONResponse)
+async def debug_document_detail(document_id: str, db: AsyncSession = Depends(get_db)):
     """Debug endpoint to see detailed information about a specific document"""
     try:
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = await db.get(Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
@@ -336,12 +355,22 @@ async def debug_document_detail(document_id: str, db: Session = Depends(get_db))
         logger.error(f"Error getting document details: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/health")
-async def health_check() -> HealthResponse:
+# Load balancers probe health every second or so per instance, so the body is
+# serialized once and only re-rendered when its timestamp is HEALTH_REFRESH_SECONDS old
+HEALTH_REFRESH_SECONDS = 5.0
+_health_body = b""
+_health_expires_at = 0.0
+
+@router.get("/health", response_model=HealthResponse)
+async def health_check() -> Response:
     """Health check endpoint"""
-    from datetime import datetime
-    return HealthResponse(
-        status="healthy",
-        service="RAG Pipeline API with Groq & SQLite",
-        timestamp=datetime.utcnow()
-    )
\ No newline at end of file
+    global _health_body, _health_expires_at
+    now = time.monotonic()
+    if now >= _health_expires_at:
+        _health_body = HealthResponse(
+            status="healthy",
+            service="RAG Pipeline API with Groq & SQLite",
+            timestamp=datetime.utcnow()
+        ).model_dump_json().encode()
+        _health_expires_at = now + HEALTH_REFRESH_SECONDS
+    return Response(content=_health_body, media_type="application/json")
\ No newline at end of file
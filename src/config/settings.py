@@ -3,7 +3,7 @@ from typing import Optional
 
 class Settings(BaseSettings):
     # Database - SQLite by default
-    database_url: str = "sqlite:///./rag_pipeline.db"
+    database_url: str = "sqlite+aiosqlite:///./rag_pipeline.db"
     
     # Redis (optional for development)
     redis_url: Optional[str] = None
@@ -14,11 +14,18 @@ class Settings(BaseSettings):
     
     # Embeddings
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
+    embedding_device: str = "auto"  # "auto", "cpu" or "cuda"
+    embedding_cache_size: int = 10000  # Query/chunk embeddings kept in memory (LRU)
+    preload_embedding_model: bool = True  # Load at import so forked workers share the weights
     
     # Vector Database
     vector_store_path: str = "./storage/vector_store"
+    chroma_batch_size: int = 200  # Chunks per vector store insert during ingestion
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    chunk_length_mode: str = "chars"  # "chars" or "tokens" (tiktoken cl100k_base)
+    ingest_workers: Optional[int] = None  # Document parsing processes, defaults to the CPUs this process may run on
     
     # RAG Configuration
     top_k: int = 5
@@ -28,6 +35,8 @@ class Settings(BaseSettings):
     # API
     max_file_size: int = 100 * 1024 * 1024  # 100MB
     max_documents: int = 20
+    enable_io_uring: bool = False  # Write uploads via io_uring on Linux (pip install -r requirements-io-uring.txt)
+    reload: bool = False  # Auto-reload on code changes when run via `python -m src.main` (development only)
     
     class Config:
         env_file = ".env"
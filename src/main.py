@@ -8,24 +8,41 @@ from sqlalchemy import text
 
 from src.config.settings import settings
 from src.models.database import create_tables, engine
-from src.api.routes import router as api_router
+from src.api.routes import router as api_router, health_check
+from src.api.responses import ORJSONResponse
+from src.api.middleware import BodySizeLimitMiddleware
+from src.api.dependencies import get_embedding_service, get_ingest_executor, get_llm_service
 from src.utils.logger import setup_logging, get_logger
 
-# Setup logging
-setup_logging()
 logger = get_logger(__name__)
 
+# When the app is started with `python -m src.main`, every spawned ingest worker
+# re-imports this module as __mp_main__; workers only parse documents, so they must
+# not add another handler on the log file or load their own copy of the model
+if __name__ != "__mp_main__":
+    # Setup logging
+    setup_logging()
+    
+    # Load the embedding model at import time so that with `gunicorn --preload` it is
+    # loaded once in the master and its weights are shared copy-on-write by the workers
+    if settings.preload_embedding_model:
+        get_embedding_service()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting RAG Pipeline API with Groq and LangChain")
     try:
-        create_tables()
+        await create_tables()
         logger.info("Database tables created successfully")
         
+        # Move the embedding model to its target device here, after workers have forked
+        if settings.preload_embedding_model:
+            get_embedding_service().to_device(settings.embedding_device)
+        
         # Test database connection
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type='table';"))
             tables = [row[0] for row in result]
             logger.info(f"Database tables: {tables}")
             
@@ -37,6 +54,11 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down RAG Pipeline API")
+    if get_ingest_executor.cache_info().currsize:
+        get_ingest_executor().shutdown(wait=False, cancel_futures=True)
+    if get_llm_service.cache_info().currsize:
+        await get_llm_service().aclose()
+    await engine.dispose()
 
 app = FastAPI(
     title="RAG Pipeline API",
@@ -45,6 +67,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Refuse oversized uploads before their body is transferred; the allowance covers the
+# multipart boundaries and part headers around the file itself
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.max_file_size + 64 * 1024)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -57,6 +83,9 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+# Same cached handler as /api/v1/health, registered before the frontend catch-all would shadow it
+app.add_api_route("/health", health_check, methods=["GET"], include_in_schema=False)
+
 # Serve frontend files
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
 if os.path.exists(frontend_path):
@@ -75,7 +104,7 @@ if os.path.exists(frontend_path):
         # If file doesn't exist, serve index.html for client-side routing
         return FileResponse(os.path.join(frontend_path, "index.html"))
 else:
-    @app.get("/")
+    @app.get("/", response_class=ORJSONResponse)
     async def root():
         return {
             "message": "RAG Pipeline API with Groq and LangChain",
@@ -84,10 +113,14 @@ else:
             "frontend": "Frontend files not found. Please build the frontend."
         }
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "RAG Pipeline API"}
-
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # uvloop and httptools come with uvicorn[standard]; reload needs the import string
+    uvicorn.run(
+        "src.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        reload=settings.reload
+    )
\ No newline at end of file
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Text, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import uuid
 import os
@@ -22,25 +23,48 @@ class Document(Base):
     file_type = Column(String, nullable=False)
     page_count = Column(Integer, nullable=True)
     chunk_count = Column(Integer, nullable=True)
-    processed = Column(Boolean, default=False)
+    processed = Column(Boolean, default=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Use SQLite for development
-engine = create_engine(
-    settings.database_url, 
-    connect_args={"check_same_thread": False}
+# Use SQLite (via aiosqlite) for development
+# Connections are pooled and reused across requests. Server backends also get a
+# liveness check on checkout and are recycled before typical idle timeouts drop them;
+# a local SQLite file never goes away underneath the pool, so it skips both
+engine_options = {"pool_size": 20, "max_overflow": 40}
+if make_url(settings.database_url).get_backend_name() != "sqlite":
+    engine_options.update(pool_pre_ping=True, pool_recycle=1800)
+
+engine = create_async_engine(settings.database_url, **engine_options)
+
+# WAL lets readers proceed alongside a writer; NORMAL sync is durable under WAL without an fsync per commit
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "foreign_keys=ON",
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # create_all skips existing tables, so add indexes introduced after the table was created
+        for index in Document.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
     print("Database tables created successfully!")
\ No newline at end of file
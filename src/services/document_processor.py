@@ -1,23 +1,73 @@
+import asyncio
 import os
 import logging
-from typing import List, Dict, Any
-from PyPDF2 import PdfReader
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Tuple
+from pypdf import PdfReader
 from docx import Document as DocxDocument
 import chardet
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = logging.getLogger(__name__)
 
+# PDFs with fewer pages than this are extracted by a single worker; below it the
+# cost of re-parsing the file in every worker outweighs the speedup
+PARALLEL_PDF_MIN_PAGES = 32
+
+@lru_cache(maxsize=None)
+def _length_function(mode: str) -> Callable[[str], int]:
+    """Return how chunk sizes are measured - cached so the tokenizer is loaded once per process"""
+    if mode == "chars":
+        return len
+    if mode == "tokens":
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        # encode_ordinary skips the special-token scan - text is never a control sequence here
+        return lambda text: len(encoding.encode_ordinary(text))
+    raise ValueError(f"Unsupported chunk length mode: {mode}")
+
+@lru_cache(maxsize=None)
+def _text_splitter(chunk_size: int, chunk_overlap: int, length_mode: str) -> RecursiveCharacterTextSplitter:
+    """Build the splitter once per process and configuration and share it across processors"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=_length_function(length_mode),
+        separators=["\n\n", "\n", ". ", "! ", "? ", " ", ""]
+    )
+
+def _extract_pages(reader: PdfReader, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text for pages [start, end) of an open PDF"""
+    pages = []
+    for page_num in range(start, end):
+        try:
+            pages.append((page_num, reader.pages[page_num].extract_text() or ""))
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num + 1}: {str(e)}")
+            pages.append((page_num, ""))
+    return pages
+
+def _pdf_page_count(file_path: str) -> int:
+    """Worker process entry point - count pages before splitting a PDF into ranges"""
+    return len(PdfReader(file_path).pages)
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Worker process entry point - opens its own reader since PdfReader is not picklable"""
+    return _extract_pages(PdfReader(file_path), start, end)
+
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, length_mode: str = "chars"):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", "! ", "? ", " ", ""]
-        )
+        # Only the mode is stored so instances stay picklable for the ingest process pool;
+        # the splitter itself is shared per process
+        self.length_mode = length_mode
+        _text_splitter(chunk_size, chunk_overlap, length_mode)
+
+    def _split_text(self, text: str) -> List[str]:
+        """Split text into chunks of up to chunk_size with chunk_overlap between them"""
+        return _text_splitter(self.chunk_size, self.chunk_overlap, self.length_mode).split_text(text)
         
     def process_document(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process a document and return chunks and metadata"""
@@ -36,24 +86,49 @@ class DocumentProcessor:
             logger.error(f"Error processing document {filename}: {str(e)}")
             raise
 
+    async def aprocess_document(
+        self, file_path: str, filename: str, executor: Executor, max_workers: int
+    ) -> Dict[str, Any]:
+        """Process a document on executor, spreading the pages of a large PDF across up to max_workers of its processes"""
+        loop = asyncio.get_running_loop()
+        if os.path.splitext(filename)[1].lower() == '.pdf' and max_workers >= 2:
+            try:
+                page_count = await loop.run_in_executor(executor, _pdf_page_count, file_path)
+                if page_count >= PARALLEL_PDF_MIN_PAGES:
+                    # One contiguous page range per worker so each process parses the file
+                    # once; gather returns the ranges in submission order, keeping pages in sequence
+                    step = -(-page_count // min(max_workers, page_count))
+                    ranges = await asyncio.gather(*[
+                        loop.run_in_executor(
+                            executor, _extract_page_range, file_path, start, min(start + step, page_count)
+                        )
+                        for start in range(0, page_count, step)
+                    ])
+                    page_texts = [page for pages in ranges for page in pages]
+                    return await loop.run_in_executor(
+                        executor, self._build_pdf_result, filename, page_count, page_texts
+                    )
+            except Exception as e:
+                logger.error(f"Error processing document {filename}: {str(e)}")
+                raise
+        
+        return await loop.run_in_executor(executor, self.process_document, file_path, filename)
+
     def _process_pdf(self, file_path: str, filename: str) -> Dict[str, Any]:
-        """Process PDF document using PyPDF2"""
+        """Process PDF document using pypdf"""
         reader = PdfReader(file_path)
-        text_chunks = []
         page_count = len(reader.pages)
+        return self._build_pdf_result(filename, page_count, _extract_pages(reader, 0, page_count))
+
+    def _build_pdf_result(self, filename: str, page_count: int, page_texts: List[Tuple[int, str]]) -> Dict[str, Any]:
+        """Chunk extracted PDF pages, given in page order"""
+        full_text = "".join(
+            f"Page {page_num + 1}:\n{page_text}\n\n"
+            for page_num, page_text in page_texts
+            if page_text.strip()
+        )
         
-        full_text = ""
-        for page_num, page in enumerate(reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text.strip():
-                    full_text += f"Page {page_num + 1}:\n{page_text}\n\n"
-            except Exception as e:
-                logger.warning(f"Error extracting text from page {page_num + 1}: {str(e)}")
-                continue
-        
-        # Use LangChain text splitter
-        chunks = self.text_splitter.split_text(full_text)
+        chunks = self._split_text(full_text)
         
         return {
             "filename": filename,
@@ -66,14 +141,11 @@ class DocumentProcessor:
     def _process_docx(self, file_path: str, filename: str) -> Dict[str, Any]:
         """Process DOCX document"""
         doc = DocxDocument(file_path)
-        full_text = ""
-        
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                full_text += paragraph.text + "\n"
+        full_text = "\n".join(
+            paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()
+        )
         
-        # Use LangChain text splitter
-        chunks = self.text_splitter.split_text(full_text)
+        chunks = self._split_text(full_text)
         
         return {
             "filename": filename,
@@ -87,13 +159,15 @@ class DocumentProcessor:
         """Process text document"""
         with open(file_path, 'rb') as file:
             raw_data = file.read()
-            encoding = chardet.detect(raw_data)['encoding'] or 'utf-8'
-            
-        with open(file_path, 'r', encoding=encoding) as file:
-            full_text = file.read()
         
-        # Use LangChain text splitter
-        chunks = self.text_splitter.split_text(full_text)
+        # Nearly all .txt/.md files are UTF-8; only run the slow chardet detection when that fails
+        try:
+            full_text = raw_data.decode('utf-8')
+        except UnicodeDecodeError:
+            encoding = chardet.detect(raw_data)['encoding'] or 'latin-1'
+            full_text = raw_data.decode(encoding, errors='replace')
+        
+        chunks = self._split_text(full_text)
         
         return {
             "filename": filename,
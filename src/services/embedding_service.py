@@ -1,5 +1,9 @@
+import hashlib
 import logging
-from typing import List
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.embeddings import Embeddings
 
@@ -7,31 +11,71 @@ from langchain_core.embeddings import Embeddings
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        device: str = "auto"
+    ):
         self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = self._resolve_device(device)
         self.embeddings = self._initialize_embeddings()
-        logger.info(f"Initialized embedding service with model: {model_name}")
+        logger.info(f"Initialized embedding service with model: {model_name} on {self.device}")
+
+    @staticmethod
+    def _resolve_device(device: str) -> str:
+        """Pick CUDA when requested or available, falling back to CPU"""
+        if device not in ("auto", "cuda"):
+            return device
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return "cuda"
+        except ImportError:
+            pass
+        if device == "cuda":
+            logger.warning("CUDA requested for embeddings but not available, using CPU")
+        return "cpu"
 
     def _initialize_embeddings(self) -> Embeddings:
         """Initialize HuggingFace embeddings"""
         try:
-            model_kwargs = {'device': 'cpu'}
-            encode_kwargs = {'normalize_embeddings': True}
+            model_kwargs = {'device': self.device}
+            encode_kwargs = {'normalize_embeddings': True, 'batch_size': self.batch_size}
             
             embeddings = HuggingFaceEmbeddings(
                 model_name=self.model_name,
                 model_kwargs=model_kwargs,
                 encode_kwargs=encode_kwargs
             )
+            if self.device == "cuda":
+                # FP16 halves memory bandwidth on GPU with negligible quality loss
+                embeddings.client.half()
             return embeddings
         except Exception as e:
             logger.error(f"Error initializing embeddings: {str(e)}")
             raise
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts"""
+    def to_device(self, device: str) -> None:
+        """Move the loaded model to another device, casting to FP16 on GPU"""
+        device = self._resolve_device(device)
+        if device == self.device:
+            return
+        self.embeddings.client.to(device)
+        if device == "cuda":
+            self.embeddings.client.half()
+        self.device = device
+        logger.info(f"Moved embedding model {self.model_name} to {device}")
+
+    def get_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Generate embeddings for a list of texts in batches of batch_size"""
         try:
-            return self.embeddings.embed_documents(texts)
+            batch_size = batch_size or self.batch_size
+            embeddings = []
+            for start in range(0, len(texts), batch_size):
+                embeddings.extend(self.embeddings.embed_documents(texts[start:start + batch_size]))
+            return embeddings
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
@@ -40,4 +84,67 @@ class EmbeddingService:
         """Get the dimension of embeddings"""
         # Test with a small text to get embedding dimension
         test_embedding = self.get_embeddings(["test"])[0]
-        return len(test_embedding)
\ No newline at end of file
+        return len(test_embedding)
+
+class CachedEmbeddings(Embeddings):
+    """LRU cache in front of another embeddings backend.
+
+    Repeated questions skip the model entirely, and embed_documents only encodes
+    the texts it hasn't seen. Vectors are kept as float32 arrays - lossless for
+    sentence-transformers output and far smaller than lists of Python floats.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, maxsize: int = 10000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[bytes, array]" = OrderedDict()
+        # Queries and ingestion run in different threadpool workers
+        self._lock = threading.Lock()
+
+    def _key(self, text: str, kind: str) -> bytes:
+        # kind ("q" or "d") keeps query and document vectors apart - backends may
+        # embed the two differently, e.g. with an instruction prefix on queries
+        return hashlib.sha256(f"{kind}\0{self.model_name}\0{text}".encode()).digest()
+
+    def _get(self, key: bytes) -> Optional[array]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _put(self, key: bytes, vector: List[float]) -> None:
+        with self._lock:
+            self._cache[key] = array("f", vector)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, "q")
+        vector = self._get(key)
+        if vector is not None:
+            return vector.tolist()
+        embedding = self.embeddings.embed_query(text)
+        self._put(key, embedding)
+        return embedding
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text, "d") for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        misses = []
+        for i, key in enumerate(keys):
+            vector = self._get(key)
+            if vector is not None:
+                results[i] = vector.tolist()
+            else:
+                misses.append(i)
+        
+        if misses:
+            # One batched call for everything not cached
+            embeddings = self.embeddings.embed_documents([texts[i] for i in misses])
+            for i, embedding in zip(misses, embeddings):
+                self._put(keys[i], embedding)
+                results[i] = embedding
+        return results
@@ -1,4 +1,8 @@
+import asyncio
 import logging
+import re
+from statistics import fmean
+import httpx
 from typing import List, Dict, Any, Optional
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -8,6 +12,41 @@ from langchain_core.output_parsers import StrOutputParser
 
 logger = logging.getLogger(__name__)
 
+# Phrases that reference sources, fused into one alternation so the answer is scanned once
+_CLEAN_RE = re.compile(
+    '|'.join(f'(?:{pattern})' for pattern in (
+        r'According to (?:the |this )?document[^.]*\.',
+        r'Based on (?:the |this )?(?:context|document|information provided)[^.]*\.',
+        r'As mentioned in (?:the |this )?(?:document|source|context)[^.]*\.',
+        r'In the (?:provided |given )?(?:context|document)[^.]*\.',
+        r'\[.*?\]',  # Remove citation brackets
+        r'\(Source:.*?\)',  # Remove source references
+    )),
+    re.IGNORECASE
+)
+# Every _CLEAN_RE alternative contains one of these (lowercased) or a '[' - answers
+# without any of them can skip the regex entirely
+_CLEAN_TRIGGERS = ('according to', 'based on', 'as mentioned in', 'in the', '(source:')
+_WS_RE = re.compile(r'\s+')
+_DOT_RE = re.compile(r'\.\.+')
+
+SYSTEM_PROMPT = """You are a helpful AI assistant that answers questions based ONLY on the provided document context.
+
+IMPORTANT INSTRUCTIONS:
+1. Answer the question concisely using ONLY the information from the provided context
+2. Do not mention that you are using context or documents in your answer
+3. If the context doesn't contain information to answer the question, say "I don't have information about that in the documents."
+4. Be natural and conversational in your response
+5. Do not include citations, references, or source mentions in your main answer
+6. If different documents have conflicting information, provide the most relevant information
+
+CONTEXT:
+{context}
+
+QUESTION: {question}
+
+Provide a clear, concise answer:"""
+
 class LLMService:
     def __init__(self, model: str = "llama-3.3-70b-versatile", api_key: Optional[str] = None):
         self.model_name = model
@@ -15,8 +54,15 @@ class LLMService:
         
         if not self.api_key:
             raise ValueError("Groq API key is required")
-            
+        
+        # One pooled client for all Groq calls so concurrent queries reuse kept-alive TLS connections
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        )
         self.llm = self._initialize_llm()
+        # The prompt template and chain are immutable, so build them once rather than per request
+        self._prompt = ChatPromptTemplate.from_messages([("system", SYSTEM_PROMPT)])
+        self._chain = self._prompt | self.llm | StrOutputParser()
         logger.info(f"Initialized LLM service with model: {model}")
 
     def _initialize_llm(self) -> ChatGroq:
@@ -26,113 +72,116 @@ class LLMService:
                 groq_api_key=self.api_key,
                 model_name=self.model_name,
                 temperature=0.1,
-                max_tokens=1000
+                max_tokens=1000,
+                http_async_client=self._http_client
             )
         except Exception as e:
             logger.error(f"Error initializing Groq LLM: {str(e)}")
             raise
 
-    async def agenerate_response(self, question: str, context_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate response using Groq LLM with context"""
-        try:
-            # Filter out low-relevance chunks and fix negative scores
-            relevant_chunks = []
-            for chunk in context_chunks:
-                # Fix negative scores - ensure they're positive
-                score = max(chunk.get('score', 0), 0)  # Ensure score is not negative
-                if score > 0.1:  # Only use chunks with reasonable relevance
-                    chunk['score'] = score
-                    relevant_chunks.append(chunk)
-            
-            if not relevant_chunks:
-                relevant_chunks = context_chunks[:3]  # Use top 3 if none meet threshold
-                # Fix scores for the fallback chunks
-                for chunk in relevant_chunks:
-                    chunk['score'] = max(chunk.get('score', 0), 0.3)
-                
-            logger.info(f"Using {len(relevant_chunks)} relevant chunks for response generation")
-
-            # Prepare context from retrieved chunks
-            context = "\n\n".join([
-                f"--- Document: {chunk['metadata'].get('filename', 'Unknown')} ---\n{chunk['content']}"
-                for chunk in relevant_chunks
-            ])
-            
-            # Create clean prompt template
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are a helpful AI assistant that answers questions based ONLY on the provided document context.
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections"""
+        await self._http_client.aclose()
 
-IMPORTANT INSTRUCTIONS:
-1. Answer the question concisely using ONLY the information from the provided context
-2. Do not mention that you are using context or documents in your answer
-3. If the context doesn't contain information to answer the question, say "I don't have information about that in the documents."
-4. Be natural and conversational in your response
-5. Do not include citations, references, or source mentions in your main answer
-6. If different documents have conflicting information, provide the most relevant information
+    def _select_chunks(self, context_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep reasonably relevant chunks, falling back to the top 3"""
+        # Filter out low-relevance chunks, clamping negative scores to 0
+        relevant_chunks = [
+            {**chunk, 'score': score} for chunk in context_chunks
+            if (score := max(chunk.get('score', 0), 0)) > 0.1  # Only use chunks with reasonable relevance
+        ]
+        
+        if not relevant_chunks:
+            # Use top 3 if none meet threshold, with a floor on their scores
+            relevant_chunks = [
+                {**chunk, 'score': max(chunk.get('score', 0), 0.3)} for chunk in context_chunks[:3]
+            ]
+            
+        logger.info("Using %d relevant chunks for response generation", len(relevant_chunks))
+        return relevant_chunks
 
-CONTEXT:
-{context}
+    @staticmethod
+    def _format_context(relevant_chunks: List[Dict[str, Any]]) -> str:
+        """Prepare context from retrieved chunks"""
+        return "\n\n".join(
+            f"--- Document: {chunk['metadata'].get('filename', 'Unknown')} ---\n{chunk['content']}"
+            for chunk in relevant_chunks
+        )
 
-QUESTION: {question}
+    def _build_result(self, answer: str, relevant_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Clean the answer and attach sources and confidence"""
+        # Clean up the answer - remove any source references
+        clean_answer = self._clean_answer(answer)
+        
+        # Calculate average confidence
+        avg_confidence = fmean(chunk['score'] for chunk in relevant_chunks) if relevant_chunks else 0.0
+        
+        return {
+            "answer": clean_answer,
+            "sources": [
+                {
+                    "content": chunk["content"][:150] + "..." if len(chunk["content"]) > 150 else chunk["content"],
+                    "metadata": chunk["metadata"],
+                    "score": chunk["score"],
+                    "relevance_percentage": round(chunk['score'] * 100, 1)
+                }
+                for chunk in relevant_chunks
+            ],
+            "confidence": avg_confidence,
+            "model_used": self.model_name,
+            "chunks_used": len(relevant_chunks)
+        }
 
-Provide a clear, concise answer:""")
-            ])
-            
-            # Create chain
-            chain = prompt | self.llm | StrOutputParser()
+    async def agenerate_response(self, question: str, context_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Generate response using Groq LLM with context"""
+        try:
+            relevant_chunks = self._select_chunks(context_chunks)
             
             # Generate response
-            answer = await chain.ainvoke({
-                "context": context,
+            answer = await self._chain.ainvoke({
+                "context": self._format_context(relevant_chunks),
                 "question": question
             })
             
-            # Clean up the answer - remove any source references
-            clean_answer = self._clean_answer(answer)
+            return self._build_result(answer, relevant_chunks)
             
-            # Calculate average confidence
-            avg_confidence = sum(chunk['score'] for chunk in relevant_chunks) / len(relevant_chunks) if relevant_chunks else 0
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {str(e)}")
+            raise
+
+    async def agenerate_batch(
+        self, questions: List[str], contexts: List[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Answer several questions concurrently"""
+        try:
+            selected = [self._select_chunks(context_chunks) for context_chunks in contexts]
+            # Fan out to Groq; results come back in question order
+            answers = await asyncio.gather(*[
+                self._chain.ainvoke({
+                    "context": self._format_context(relevant_chunks),
+                    "question": question
+                })
+                for question, relevant_chunks in zip(questions, selected)
+            ])
             
-            return {
-                "answer": clean_answer,
-                "sources": [
-                    {
-                        "content": chunk["content"][:150] + "..." if len(chunk["content"]) > 150 else chunk["content"],
-                        "metadata": chunk["metadata"],
-                        "score": chunk["score"],
-                        "relevance_percentage": f"{(chunk['score'] * 100):.1f}%"
-                    }
-                    for chunk in relevant_chunks
-                ],
-                "confidence": avg_confidence,
-                "model_used": self.model_name,
-                "chunks_used": len(relevant_chunks)
-            }
+            return [
+                self._build_result(answer, relevant_chunks)
+                for answer, relevant_chunks in zip(answers, selected)
+            ]
             
         except Exception as e:
-            logger.error(f"Error generating LLM response: {str(e)}")
+            logger.error(f"Error generating batched LLM responses: {str(e)}")
             raise
 
     def _clean_answer(self, answer: str) -> str:
         """Remove source references from the answer"""
-        import re
-        # Remove phrases that reference sources
-        patterns = [
-            r'According to (?:the |this )?document[^.]*\.',
-            r'Based on (?:the |this )?(?:context|document|information provided)[^.]*\.',
-            r'As mentioned in (?:the |this )?(?:document|source|context)[^.]*\.',
-            r'In the (?:provided |given )?(?:context|document)[^.]*\.',
-            r'\[.*?\]',  # Remove citation brackets
-            r'\(Source:.*?\)',  # Remove source references
-        ]
-        
         clean_answer = answer
-        for pattern in patterns:
-            clean_answer = re.sub(pattern, '', clean_answer, flags=re.IGNORECASE)
+        if '[' in answer or any(trigger in answer.lower() for trigger in _CLEAN_TRIGGERS):
+            clean_answer = _CLEAN_RE.sub('', answer)
         
         # Clean up extra spaces and periods
-        clean_answer = re.sub(r'\s+', ' ', clean_answer)
-        clean_answer = re.sub(r'\.\.+', '.', clean_answer)
+        clean_answer = _WS_RE.sub(' ', clean_answer)
+        clean_answer = _DOT_RE.sub('.', clean_answer)
         clean_answer = clean_answer.strip()
         
         # Ensure the answer ends with proper punctuation
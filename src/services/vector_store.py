@@ -2,50 +2,100 @@ import logging
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 import os
+import time
+import uuid
+import numpy as np
 from langchain_chroma import Chroma
 from langchain_core.embeddings import Embeddings
-from langchain_core.documents import Document as LangchainDocument
 
 
 
 logger = logging.getLogger(__name__)
 
+# Distance -> relevance for each HNSW space, applied to a query's whole distance array
+RELEVANCE_BY_SPACE = {
+    "cosine": lambda distances: 1.0 - distances,
+    "l2": lambda distances: 1.0 - distances / np.sqrt(2),
+    "ip": lambda distances: np.where(distances > 0, 1.0 - distances, -distances),
+}
+
+# The collection size is tracked in-process and reconciled with Chroma's own count once
+# it is this old, picking up writes made outside this VectorStore (e.g. maintenance scripts)
+COUNT_TTL_SECONDS = 5.0
+
 class VectorStore:
-    def __init__(self, embeddings: Embeddings, persist_directory: str = "./storage/vector_store"):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        persist_directory: str = "./storage/vector_store",
+        hnsw_space: str = "cosine",
+        hnsw_m: int = 24,
+        hnsw_construction_ef: int = 128,
+        hnsw_search_ef: int = 100
+    ):
         self.persist_directory = persist_directory
         os.makedirs(persist_directory, exist_ok=True)
         
         # Initialize LangChain Chroma
+        # The HNSW settings only apply when the collection is first created; sentence-transformer
+        # embeddings are compared by cosine, and the wider graph and search list raise recall
         self.vector_store = Chroma(
             persist_directory=persist_directory,
             embedding_function=embeddings,
-            collection_name="document_chunks"
+            collection_name="document_chunks",
+            collection_metadata={
+                "hnsw:space": hnsw_space,
+                "hnsw:M": hnsw_m,
+                "hnsw:construction_ef": hnsw_construction_ef,
+                "hnsw:search_ef": hnsw_search_ef
+            }
         )
         
+        # The collection's actual space decides the score conversion - collections created
+        # before cosine was configured are still l2
+        hnsw_config = self.vector_store._collection.configuration.get("hnsw") or {}
+        self._relevance_fn = RELEVANCE_BY_SPACE[hnsw_config.get("space", "l2")]
+        self._count = self.vector_store._collection.count()
+        self._count_expires_at = time.monotonic() + COUNT_TTL_SECONDS
+        
         logger.info("Vector store initialized with LangChain Chroma")
 
+    def _collection_count(self) -> int:
+        """Collection size, reconciled with Chroma at most every COUNT_TTL_SECONDS"""
+        now = time.monotonic()
+        if now >= self._count_expires_at:
+            self._count = self.vector_store._collection.count()
+            self._count_expires_at = now + COUNT_TTL_SECONDS
+        return self._count
+
     def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
-        """Add documents to vector store using LangChain"""
+        """Add documents to vector store, embedding them in one batched call"""
         try:
-            # Convert to LangChain Document format
-            langchain_docs = []
-            for doc in documents:
-                langchain_docs.append(
-                    LangchainDocument(
-                        page_content=doc["content"],
-                        metadata={
-                            "document_id": doc["document_id"],
-                            "chunk_index": doc["chunk_index"],
-                            "filename": doc["filename"],
-                            "source": doc["filename"]
-                        }
-                    )
-                )
+            texts = [doc["content"] for doc in documents]
+            metadatas = [
+                {
+                    "document_id": doc["document_id"],
+                    "chunk_index": doc["chunk_index"],
+                    "filename": doc["filename"],
+                    "source": doc["filename"]
+                }
+                for doc in documents
+            ]
+            ids = [str(uuid.uuid4()) for _ in documents]
             
-            # Add to vector store
-            ids = self.vector_store.add_documents(langchain_docs)
+            # Go straight to the collection: LangChain would wrap every chunk in a Document
+            # and upsert, which has to check each id for an existing row first
+            embeddings = self.vector_store.embeddings.embed_documents(texts)
+            self.vector_store._collection.add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
+            )
+            
+            self._count += len(ids)
             
-            logger.info(f"Added {len(documents)} documents to vector store")
+            logger.info("Added %d documents to vector store", len(documents))
             return ids
             
         except Exception as e:
@@ -53,33 +103,47 @@ class VectorStore:
             raise
 
     def search(self, query: str, top_k: int = 5, document_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        """Search for similar documents using LangChain with proper scoring"""
+        """Search for similar documents, scored by relevance in [0, 1]"""
         try:
             # Build filter if document_ids provided
             filter_dict = None
             if document_ids:
                 filter_dict = {"document_id": {"$in": document_ids}}
             
-            # Use similarity_search_with_relevance_scores for better scoring
-            results = self.vector_store.similarity_search_with_relevance_scores(
-                query=query,
-                k=top_k,
-                filter=filter_dict
+            # An empty store can't match anything - skip embedding the query and the index
+            # lookup; otherwise never ask for more neighbours than the collection holds
+            count = self._collection_count()
+            if count == 0:
+                return []
+            
+            # Query the collection directly - the LangChain wrapper would build a Document per
+            # hit only for its content and metadata to be copied back out
+            raw = self.vector_store._collection.query(
+                query_embeddings=[self.vector_store.embeddings.embed_query(query)],
+                n_results=min(top_k, count),
+                where=filter_dict,
+                include=["documents", "metadatas", "distances"]
             )
             
-            # Format results with proper scoring
-            formatted_results = []
-            for doc, score in results:
-                # Chroma returns cosine similarity scores between 0-1
-                # Higher score = more relevant
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score),  # Direct similarity score
-                    "similarity": float(score)
-                })
+            # Higher score = more relevant; convert all distances in one array operation
+            distances = np.asarray(raw["distances"][0], dtype=np.float32)
+            scores = np.clip(self._relevance_fn(distances), 0.0, 1.0).tolist()
+            formatted_results = [
+                {
+                    "content": content,
+                    "metadata": metadata,
+                    "score": score,
+                    "similarity": score
+                }
+                for content, metadata, score in zip(raw["documents"][0], raw["metadatas"][0], scores)
+            ]
             
-            logger.info(f"Search returned {len(formatted_results)} results with scores: {[r['score'] for r in formatted_results]}")
+            # Only build the score list when the record will actually be emitted
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Search returned %d results with scores: %s",
+                    len(formatted_results), [r['score'] for r in formatted_results]
+                )
             return formatted_results
             
         except Exception as e:
@@ -89,22 +153,12 @@ class VectorStore:
     def delete_documents(self, document_ids: List[str]):
         """Delete documents from vector store"""
         try:
-            # Get all documents in the collection
-            all_docs = self.vector_store.get()
-            
-            # Find IDs to delete
-            ids_to_delete = []
-            if all_docs and 'metadatas' in all_docs:
-                for i, metadata in enumerate(all_docs['metadatas']):
-                    if metadata and 'document_id' in metadata and metadata['document_id'] in document_ids:
-                        if 'ids' in all_docs and i < len(all_docs['ids']):
-                            ids_to_delete.append(all_docs['ids'][i])
-            
-            # Delete the documents
-            if ids_to_delete:
-                self.vector_store.delete(ids=ids_to_delete)
+            # Filter on metadata inside Chroma rather than pulling the whole collection into Python
+            self.vector_store._collection.delete(where={"document_id": {"$in": document_ids}})
+            # Chroma doesn't report how many chunks matched, so recount on the next lookup
+            self._count_expires_at = 0.0
             
-            logger.info(f"Deleted documents with IDs: {document_ids}")
+            logger.info("Deleted documents with IDs: %s", document_ids)
         except Exception as e:
             logger.error(f"Error deleting documents from vector store: {str(e)}")
             raise
@@ -112,9 +166,8 @@ class VectorStore:
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store collection"""
         try:
-            count = self.vector_store._collection.count()
             return {
-                "total_chunks": count,
+                "total_chunks": self._collection_count(),
                 "collection_name": "document_chunks",
                 "vector_store": "ChromaDB with proper similarity scoring"
             }
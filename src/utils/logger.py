@@ -1,7 +1,15 @@
+import atexit
 import logging
 import logging.config
 import json
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Tuple
+
+_queue_handler: Optional[QueueHandler] = None
+_handlers: Tuple[logging.Handler, ...] = ()
+_listener: Optional[QueueListener] = None
 
 def setup_logging():
     """Setup logging configuration"""
@@ -55,7 +63,42 @@ def setup_logging():
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
+    # Flush anything still queued before dictConfig closes the previous handlers
+    _stop_listener()
     logging.config.dictConfig(log_config)
+    
+    # The configured handlers write to stdout and to disk (with rotation checks) on the
+    # calling thread. Route every logger through a queue instead, so request handlers
+    # only enqueue records and a background listener thread does the I/O
+    global _queue_handler, _handlers
+    _handlers = tuple(logging.getLogger().handlers)
+    _queue_handler = QueueHandler(queue.SimpleQueue())
+    for name in log_config['loggers']:
+        configured_logger = logging.getLogger(name)
+        for handler in _handlers:
+            configured_logger.removeHandler(handler)
+        configured_logger.addHandler(_queue_handler)
+    _start_listener()
+
+def _start_listener():
+    """Start a listener thread draining a fresh queue into the real handlers"""
+    global _listener
+    if _queue_handler is None:
+        return
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+
+def _stop_listener():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+# Threads don't survive fork, so gunicorn --preload workers need their own listener
+os.register_at_fork(after_in_child=_start_listener)
+atexit.register(_stop_listener)
 
 def get_logger(name: str) -> logging.Logger:
     """Get logger with given name"""
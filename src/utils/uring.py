@@ -0,0 +1,106 @@
+import asyncio
+import itertools
+import logging
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+try:
+    import liburing
+except ImportError:  # Optional dependency, Linux only
+    liburing = None
+
+logger = logging.getLogger(__name__)
+
+class UringWriter:
+    """Submits file writes to an io_uring and resolves them on the event loop.
+
+    Completions are signalled through an eventfd registered with the ring, which
+    the loop watches like any socket, so writes never occupy a thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, entries: int = 64):
+        self.loop = loop
+        self._ring = liburing.Ring()
+        self._cqe = liburing.Cqe()
+        result = liburing.io_uring_queue_init(entries, self._ring)
+        if result:
+            raise OSError(-result, "io_uring_queue_init failed")
+        self._eventfd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        liburing.io_uring_register_eventfd(self._ring, self._eventfd)
+        # user_data -> (future, fd, buffer, offset, bytes already written); the buffer
+        # must stay referenced until the kernel has completed the write
+        self._pending: Dict[int, Tuple[asyncio.Future, int, bytes, int, int]] = {}
+        self._ids = itertools.count(1)
+        loop.add_reader(self._eventfd, self._reap)
+
+    def write(self, fd: int, data: bytes, offset: int) -> asyncio.Future:
+        """Queue a write of data at offset; the future resolves to the bytes written"""
+        future = self.loop.create_future()
+        self._submit(future, fd, data, offset)
+        return future
+
+    def _submit(self, future: asyncio.Future, fd: int, data: bytes, offset: int, written: int = 0):
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_write(sqe, fd, data, offset)
+        user_data = next(self._ids)
+        sqe.user_data = user_data
+        self._pending[user_data] = (future, fd, data, offset, written)
+        liburing.io_uring_submit(self._ring)
+
+    def _reap(self):
+        try:
+            os.eventfd_read(self._eventfd)
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                liburing.io_uring_peek_cqe(self._ring, self._cqe)
+            except BlockingIOError:
+                break
+            cqe = self._cqe[0]
+            user_data = cqe.user_data
+            try:
+                # liburing raises the errno of a failed request when res is read
+                result, error = cqe.res, None
+            except OSError as e:
+                result, error = -1, e
+            liburing.io_uring_cqe_seen(self._ring, cqe)
+            future, fd, data, offset, written = self._pending.pop(user_data)
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            elif result < len(data):
+                # Short write - resubmit the remainder against the same future
+                self._submit(future, fd, data[result:], offset + result, written + result)
+            else:
+                future.set_result(written + result)
+
+    def close(self):
+        if not self.loop.is_closed():
+            self.loop.remove_reader(self._eventfd)
+        liburing.io_uring_queue_exit(self._ring)
+        os.close(self._eventfd)
+
+_writer: Optional[UringWriter] = None
+_unavailable = liburing is None or not sys.platform.startswith("linux")
+
+def get_writer() -> Optional[UringWriter]:
+    """Return the io_uring writer for the running loop, or None if io_uring can't be used"""
+    global _writer, _unavailable
+    if _unavailable:
+        return None
+    loop = asyncio.get_running_loop()
+    if _writer is not None and _writer.loop is not loop:
+        _writer.close()
+        _writer = None
+    if _writer is None:
+        try:
+            _writer = UringWriter(loop)
+        except Exception as e:
+            # e.g. kernels without io_uring or containers that block it via seccomp
+            logger.warning(f"io_uring unavailable, falling back to threaded file I/O: {str(e)}")
+            _unavailable = True
+            return None
+    return _writer
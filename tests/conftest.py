@@ -1,37 +1,41 @@
+import asyncio
 import pytest
 import os
 import tempfile
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+
+# Don't load the embedding model just by importing the app
+os.environ.setdefault("PRELOAD_EMBEDDING_MODEL", "false")
 
 from src.main import app
 from src.models.database import Base, get_db
 
 # Test database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+
+# NullPool: the TestClient runs the app on its own event loop, so connections must not be shared across loops
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async def _run_sync(fn):
+    async with engine.begin() as conn:
+        await conn.run_sync(fn)
 
 @pytest.fixture(scope="function")
 def test_db():
     """Create a fresh database for each test"""
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(_run_sync(Base.metadata.create_all))
     yield
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(_run_sync(Base.metadata.drop_all))
 
 @pytest.fixture(scope="function")
 def client(test_db):
     """Create test client with test database"""
-    def override_get_db():
-        try:
-            db = TestingSessionLocal()
+    async def override_get_db():
+        async with TestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
     
     app.dependency_overrides[get_db] = override_get_db
     client = TestClient(app)
@@ -58,4 +62,26 @@ def sample_text_file():
         f.write("This is a sample text file for testing.\n" * 10)
         f.flush()
         yield f.name
-    os.unlink(f.name)
\ No newline at end of file
+    os.unlink(f.name)
+@pytest.fixture
+def multi_page_pdf_file(tmp_path):
+    """Create a 7-page PDF whose pages contain extractable text"""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    }))
+    for page_num in range(1, 8):
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td (Text on page {page_num}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+    file_path = tmp_path / "multi_page.pdf"
+    writer.write(str(file_path))
+    return str(file_path)
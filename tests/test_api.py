@@ -1,6 +1,8 @@
 import pytest
 from fastapi.testclient import TestClient
 from src.main import app
+from src.api.middleware import BodySizeLimitMiddleware
+from src.config.settings import settings
 
 client = TestClient(app)
 
@@ -16,6 +18,21 @@ def test_upload_document_invalid_type():
     )
     assert response.status_code == 400
 
+def test_oversized_body_rejected_before_route():
+    limit = next(
+        middleware.kwargs["max_body_size"] for middleware in app.user_middleware
+        if middleware.cls is BodySizeLimitMiddleware
+    )
+    assert limit == settings.max_file_size + 64 * 1024
+    
+    response = client.post(
+        "/api/v1/documents/upload",
+        files={"file": ("test.txt", b"x" * (limit + 1), "text/plain")}
+    )
+    # 413 from the middleware, not the route's own 400 size check
+    assert response.status_code == 413
+    assert response.json()["detail"] == f"Request body too large. Maximum size is {limit} bytes"
+
 def test_query_no_documents():
     response = client.post(
         "/api/v1/query",
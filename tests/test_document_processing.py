@@ -1,6 +1,8 @@
 import pytest
 import os
-from src.services.document_processor import DocumentProcessor
+from concurrent.futures import ThreadPoolExecutor
+from src.services import document_processor as document_processor_module
+from src.services.document_processor import DocumentProcessor, _text_splitter
 
 def test_text_splitting():
     processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
@@ -20,6 +22,26 @@ def test_pdf_processing(sample_pdf_file):
     assert "chunks" in result
     assert isinstance(result["chunks"], list)
 
+@pytest.mark.asyncio
+async def test_large_pdf_pages_spread_across_executor(multi_page_pdf_file, monkeypatch):
+    monkeypatch.setattr(document_processor_module, "PARALLEL_PDF_MIN_PAGES", 4)
+    ranges = []
+    extract_page_range = document_processor_module._extract_page_range
+    def record_range(file_path, start, end):
+        ranges.append((start, end))
+        return extract_page_range(file_path, start, end)
+    monkeypatch.setattr(document_processor_module, "_extract_page_range", record_range)
+    processor = DocumentProcessor()
+    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        result = await processor.aprocess_document(multi_page_pdf_file, "large.pdf", executor, 3)
+    
+    assert sorted(ranges) == [(0, 3), (3, 6), (6, 7)]
+    assert result["page_count"] == 7
+    # Pages come back in order, exactly as a single worker would produce them
+    assert result == processor.process_document(multi_page_pdf_file, "large.pdf")
+    assert result["chunks"][0].startswith("Page 1:\nText on page 1")
+
 def test_text_processing(sample_text_file):
     processor = DocumentProcessor()
     result = processor.process_document(sample_text_file, "test.txt")
@@ -43,6 +65,16 @@ def test_chunk_overlap():
         # Check that chunks overlap (simplified check)
         assert len(chunks) > 1  # Should have multiple chunks
 
+def test_chars_mode_measures_with_len():
+    processor = DocumentProcessor(chunk_size=100, chunk_overlap=20)
+    # The default mode must not route every length through a wrapper
+    assert _text_splitter(100, 20, "chars")._length_function is len
+    assert processor._split_text("short text") == ["short text"]
+
+def test_invalid_length_mode():
+    with pytest.raises(ValueError):
+        DocumentProcessor(length_mode="words")
+
 def test_empty_file():
     processor = DocumentProcessor()
     # Create empty file
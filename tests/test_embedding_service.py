@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import Mock
+from src.services.embedding_service import CachedEmbeddings
+
+@pytest.fixture
+def mock_backend():
+    backend = Mock()
+    backend.embed_query.side_effect = lambda text: [float(len(text)), 1.0]
+    backend.embed_documents.side_effect = lambda texts: [[float(len(text)), 0.0] for text in texts]
+    return backend
+
+def test_embed_query_cached(mock_backend):
+    cached = CachedEmbeddings(mock_backend, model_name="test-model")
+
+    first = cached.embed_query("hello")
+    second = cached.embed_query("hello")
+
+    assert first == second == [5.0, 1.0]
+    mock_backend.embed_query.assert_called_once_with("hello")
+
+def test_embed_documents_only_encodes_misses(mock_backend):
+    cached = CachedEmbeddings(mock_backend, model_name="test-model")
+    cached.embed_documents(["a", "bb"])
+    mock_backend.embed_documents.reset_mock()
+
+    result = cached.embed_documents(["bb", "ccc", "a", "dddd"])
+
+    mock_backend.embed_documents.assert_called_once_with(["ccc", "dddd"])
+    assert result == [[2.0, 0.0], [3.0, 0.0], [1.0, 0.0], [4.0, 0.0]]
+
+def test_embed_documents_all_cached_skips_backend(mock_backend):
+    cached = CachedEmbeddings(mock_backend, model_name="test-model")
+    cached.embed_documents(["a", "bb"])
+    mock_backend.embed_documents.reset_mock()
+
+    assert cached.embed_documents(["bb", "a"]) == [[2.0, 0.0], [1.0, 0.0]]
+    mock_backend.embed_documents.assert_not_called()
+
+def test_queries_and_documents_cached_separately(mock_backend):
+    cached = CachedEmbeddings(mock_backend, model_name="test-model")
+
+    assert cached.embed_query("same text") == [9.0, 1.0]
+    assert cached.embed_documents(["same text"]) == [[9.0, 0.0]]
+    mock_backend.embed_documents.assert_called_once_with(["same text"])
+
+def test_lru_eviction(mock_backend):
+    cached = CachedEmbeddings(mock_backend, model_name="test-model", maxsize=2)
+    cached.embed_query("one")
+    cached.embed_query("two")
+    cached.embed_query("one")  # "two" is now least recently used
+    cached.embed_query("three")
+    mock_backend.embed_query.reset_mock()
+
+    cached.embed_query("one")
+    cached.embed_query("three")
+    mock_backend.embed_query.assert_not_called()
+
+    cached.embed_query("two")
+    mock_backend.embed_query.assert_called_once_with("two")
+    assert len(cached._cache) == 2
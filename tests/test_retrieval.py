@@ -1,23 +1,38 @@
+import math
 import pytest
 from unittest.mock import Mock, patch
 from src.services.vector_store import VectorStore
-from src.services.embedding_service import EmbeddingService
 
 @pytest.fixture
 def mock_embeddings():
     embeddings = Mock()
-    embeddings.embed_documents.return_value = [[0.1] * 384]  # Mock embedding
+    embeddings.embed_documents.side_effect = lambda texts: [[0.1] * 384 for _ in texts]
+    embeddings.embed_query.return_value = [0.1] * 384
     return embeddings
 
 @pytest.fixture
-def vector_store(mock_embeddings):
-    with patch('src.services.vector_store.Chroma') as mock_chroma:
-        with patch('src.services.vector_store.chromadb.PersistentClient'):
-            store = VectorStore(embeddings=mock_embeddings)
-            store.vector_store = mock_chroma.return_value
-            return store
-
-def test_add_documents(vector_store):
+def make_vector_store(mock_embeddings, tmp_path):
+    def _make(space="cosine", count=10):
+        with patch('src.services.vector_store.Chroma') as mock_chroma:
+            collection = mock_chroma.return_value._collection
+            collection.configuration = {"hnsw": {"space": space}}
+            collection.count.return_value = count
+            mock_chroma.return_value.embeddings = mock_embeddings
+            return VectorStore(embeddings=mock_embeddings, persist_directory=str(tmp_path))
+    return _make
+
+@pytest.fixture
+def vector_store(make_vector_store):
+    return make_vector_store()
+
+def query_result(distances):
+    return {
+        "documents": [[f"Test content {i}" for i in range(len(distances))]],
+        "metadatas": [[{"document_id": "doc1", "chunk_index": i} for i in range(len(distances))]],
+        "distances": [distances]
+    }
+
+def test_add_documents(vector_store, mock_embeddings):
     documents = [
         {
             "content": "Test document content 1",
@@ -26,56 +41,92 @@ def test_add_documents(vector_store):
             "filename": "test1.pdf"
         },
         {
-            "content": "Test document content 2", 
+            "content": "Test document content 2",
             "document_id": "doc1",
             "chunk_index": 1,
             "filename": "test1.pdf"
         }
     ]
-    
-    with patch.object(vector_store.vector_store, 'add_documents') as mock_add:
-        mock_add.return_value = ["id1", "id2"]
-        result = vector_store.add_documents(documents)
-        
-        assert result == ["id1", "id2"]
-        mock_add.assert_called_once()
-
-def test_search(vector_store):
-    query = "test query"
-    
-    mock_doc = Mock()
-    mock_doc.page_content = "Test content"
-    mock_doc.metadata = {"document_id": "doc1", "chunk_index": 0}
-    
-    with patch.object(vector_store.vector_store, 'similarity_search_with_score') as mock_search:
-        mock_search.return_value = [(mock_doc, 0.1)]
-        
-        results = vector_store.search(query, top_k=3)
-        
-        assert len(results) == 1
-        assert results[0]["content"] == "Test content"
-        assert results[0]["score"] == 0.9  # 1 - distance
+    collection = vector_store.vector_store._collection
+
+    ids = vector_store.add_documents(documents)
+
+    assert len(ids) == 2
+    mock_embeddings.embed_documents.assert_called_once_with(
+        ["Test document content 1", "Test document content 2"]
+    )
+    kwargs = collection.add.call_args.kwargs
+    assert kwargs["ids"] == ids
+    assert kwargs["documents"] == ["Test document content 1", "Test document content 2"]
+    assert kwargs["metadatas"][1] == {
+        "document_id": "doc1", "chunk_index": 1, "filename": "test1.pdf", "source": "test1.pdf"
+    }
+    assert vector_store._count == 12
+
+def test_search_cosine_scores(make_vector_store):
+    store = make_vector_store(space="cosine")
+    store.vector_store._collection.query.return_value = query_result([0.1, 0.4])
+
+    results = store.search("test query", top_k=3)
+
+    assert [r["content"] for r in results] == ["Test content 0", "Test content 1"]
+    assert results[0]["score"] == pytest.approx(0.9)
+    assert results[1]["score"] == pytest.approx(0.6)
+    assert results[0]["similarity"] == results[0]["score"]
+
+def test_search_l2_scores(make_vector_store):
+    store = make_vector_store(space="l2")
+    store.vector_store._collection.query.return_value = query_result([0.5])
+
+    results = store.search("test query")
+
+    assert results[0]["score"] == pytest.approx(1 - 0.5 / math.sqrt(2))
+
+def test_search_scores_clipped(make_vector_store):
+    store = make_vector_store(space="cosine")
+    store.vector_store._collection.query.return_value = query_result([-0.2, 1.5])
+
+    results = store.search("test query")
+
+    assert [r["score"] for r in results] == [1.0, 0.0]
 
 def test_search_with_filter(vector_store):
-    query = "test query"
     document_ids = ["doc1", "doc2"]
-    
-    with patch.object(vector_store.vector_store, 'similarity_search_with_score') as mock_search:
-        vector_store.search(query, top_k=5, document_ids=document_ids)
-        
-        # Check that filter was passed
-        call_args = mock_search.call_args
-        assert call_args[1]['filter'] == {"document_id": {"$in": document_ids}}
+    collection = vector_store.vector_store._collection
+    collection.query.return_value = query_result([])
+
+    vector_store.search("test query", top_k=5, document_ids=document_ids)
+
+    kwargs = collection.query.call_args.kwargs
+    assert kwargs["where"] == {"document_id": {"$in": document_ids}}
+    assert kwargs["n_results"] == 5
+
+def test_search_caps_results_at_collection_size(make_vector_store):
+    store = make_vector_store(count=2)
+    collection = store.vector_store._collection
+    collection.query.return_value = query_result([0.1, 0.2])
+
+    store.search("test query", top_k=5)
+
+    assert collection.query.call_args.kwargs["n_results"] == 2
+    assert collection.query.call_args.kwargs["where"] is None
+
+def test_search_empty_collection(make_vector_store, mock_embeddings):
+    store = make_vector_store(count=0)
+
+    assert store.search("test query") == []
+    mock_embeddings.embed_query.assert_not_called()
+    store.vector_store._collection.query.assert_not_called()
 
 def test_delete_documents(vector_store):
     document_ids = ["doc1", "doc2"]
-    
-    with patch('src.services.vector_store.chromadb.PersistentClient') as mock_client:
-        mock_collection = Mock()
-        mock_client.return_value.get_collection.return_value = mock_collection
-        
-        vector_store.delete_documents(document_ids)
-        
-        mock_collection.delete.assert_called_once_with(
-            where={"document_id": {"$in": document_ids}}
-        )
\ No newline at end of file
+    collection = vector_store.vector_store._collection
+
+    vector_store.delete_documents(document_ids)
+
+    collection.delete.assert_called_once_with(
+        where={"document_id": {"$in": document_ids}}
+    )
+    # The next lookup reconciles with Chroma's count
+    collection.count.return_value = 4
+    assert vector_store.get_collection_stats()["total_chunks"] == 4
@@ -0,0 +1,63 @@
+import io
+import os
+import sys
+import pytest
+import pytest_asyncio
+from starlette.datastructures import UploadFile
+
+pytest.importorskip("liburing")
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="io_uring is Linux only")
+
+from src.utils import uring
+from src.utils.file_handlers import UPLOAD_CHUNK_SIZE, _write_with_io_uring
+
+@pytest_asyncio.fixture
+async def writer():
+    writer = uring.get_writer()
+    if writer is None:
+        pytest.skip("io_uring is not usable on this kernel")
+    yield writer
+    writer.close()
+    uring._writer = None
+
+@pytest.mark.asyncio
+async def test_upload_written_through_io_uring(writer, tmp_path):
+    # Several MiB with a chunk-sized tail, so writes overlap and the last one is partial
+    payload = os.urandom(5 * 1024 * 1024 + UPLOAD_CHUNK_SIZE // 3)
+    upload = UploadFile(file=io.BytesIO(payload), filename="large.bin")
+    file_path = str(tmp_path / "large.bin")
+
+    written = await _write_with_io_uring(writer, upload, file_path)
+
+    assert written == len(payload)
+    with open(file_path, "rb") as f:
+        assert f.read() == payload
+
+@pytest.mark.asyncio
+async def test_failed_write_raises(writer, tmp_path):
+    file_path = tmp_path / "readonly.bin"
+    file_path.write_bytes(b"")
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        with pytest.raises(OSError):
+            await writer.write(fd, b"data", 0)
+    finally:
+        os.close(fd)
+    assert not writer._pending
+
+@pytest.mark.asyncio
+async def test_failed_read_drains_in_flight_write(writer, tmp_path):
+    class FailingUpload(UploadFile):
+        async def read(self, size=-1):
+            if self.file.tell():
+                raise IOError("client disconnected")
+            return await super().read(size)
+    
+    upload = FailingUpload(file=io.BytesIO(os.urandom(2 * UPLOAD_CHUNK_SIZE)), filename="partial.bin")
+    
+    with pytest.raises(IOError, match="client disconnected"):
+        await _write_with_io_uring(writer, upload, str(tmp_path / "partial.bin"))
+    
+    # The first chunk's write completed before the fd was closed
+    assert not writer._pending
+    assert (tmp_path / "partial.bin").stat().st_size == UPLOAD_CHUNK_SIZE